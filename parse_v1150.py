@@ -1,9 +1,12 @@
 #! /usr/bin/env python
 """We are obviously playing with a parser here ..."""
-from enum import IntEnum
-from functools import partial
+import mmap
+import os
+import sys
+from itertools import takewhile
+from sys import intern
 
-import geojson
+import orjson
 
 IN = 'x-plane-v1150-earth_nav.dat'
 OUT = 'x-plane-v1150-earth_nav.geojson'
@@ -11,23 +14,24 @@ OFFSET = 3
 END_ROW_CODE_STR = str(99)
 
 
-class NDB(IntEnum):
-    """NDB class (formerly reception range in nautical miles)."""
-    LOCATOR = 15,
-    LOW_POWER = 25,
-    NORMAL = 50,
-    HIGH_POWER = 75,
+# NDB class (formerly reception range in nautical miles).
+NDB_NAMES = {
+    15: "LOCATOR",
+    25: "LOW_POWER",
+    50: "NORMAL",
+    75: "HIGH_POWER",
+}
 
 
-class VOR(IntEnum):
-    """VOR class (formerly reception range in nautical miles)
-    Note:
-        125 = unspecified but likely high power VOR. Uses the higher of 5.35 class and 5.149 figure of merit.
-    """
-    TERMINAL = 25,
-    LOW_ALTITUDE = 40,
-    HIGH_ALTITUDE = 130,
-    UNSPECIFIED = 125,
+# VOR class (formerly reception range in nautical miles)
+# Note:
+#     125 = unspecified but likely high power VOR. Uses the higher of 5.35 class and 5.149 figure of merit.
+VOR_NAMES = {
+    25: "TERMINAL",
+    40: "LOW_ALTITUDE",
+    130: "HIGH_ALTITUDE",
+    125: "UNSPECIFIED",
+}
 
 
 """DME service volume (formerly maximum reception range) 
@@ -36,23 +40,7 @@ When provided, use 5.277 D-OSV, otherwise 5.35 class or 5.149 figure of merit, w
 """
 
 
-def ndb_code(number):
-    """Look up an NDB enum."""
-    for member in NDB:
-        if member == number:
-            return member
-    return None
-
-
-def vor_code(number):
-    """Look up a VOR enum."""
-    for member in VOR:
-        if member == number:
-            return member
-    return None
-
-
-def parse_ndb(payload):
+def parse_ndb(payload, row_code):
     """
     Non-directional beacon (NDB):
     -----------------------------
@@ -75,28 +63,21 @@ def parse_ndb(payload):
      2 -10.366666667   56.600000000        0      429    75      0.000  AGG ENRT FI AGALEGA NDB
      2   5.569177778   -0.181780556        0      258    15      0.000   AL ENRT DG ACCRA NDB
     """
-    row_code = 2
-    lat, rest = payload.lstrip().split(" ", 1)
-    lat = float(lat)
-    lon, rest = rest.lstrip().split(" ", 1)
-    lon = float(lon)
-    elev_ft_above_msl, rest = rest.lstrip().split(" ", 1)
-    elev_ft_above_msl = int(elev_ft_above_msl)
-    freq_khz, rest = rest.lstrip().split(" ", 1)
-    freq_khz = int(freq_khz)
-    ndb_class, rest = rest.lstrip().split(" ", 1)
-    ndb_class = ndb_code(int(ndb_class))
-    ndb_class = ndb_class.name if ndb_class else None
-    _, rest = rest.lstrip().split(" ", 1)
-    local_id, rest = rest.lstrip().split(" ", 1)
-    ndb_terminal_region_id, rest = rest.lstrip().split(" ", 1)
-    icao_region_code, rest = rest.lstrip().split(" ", 1)
-    name = rest.strip()
+    parts = payload.split(None, 9)
+    lat = float(parts[0])
+    lon = float(parts[1])
+    elev_ft_above_msl = int(parts[2])
+    freq_khz = int(parts[3])
+    ndb_class = NDB_NAMES.get(int(parts[4]))
+    local_id = parts[6]
+    ndb_terminal_region_id = intern(parts[7])
+    icao_region_code = intern(parts[8])
+    name = parts[9]
     
     return "NDB", row_code, lat, lon, elev_ft_above_msl, freq_khz, ndb_class, None, local_id, ndb_terminal_region_id, icao_region_code, name
 
 
-def parse_vor(payload):
+def parse_vor(payload, row_code):
     """
     Includes VOR-DMEs and VORTACs:
     ------------------------------
@@ -119,28 +100,39 @@ def parse_vor(payload):
     3  32.462833333   13.169508333      489    11510   130      2.000  ABU ENRT HL ABU ARGUB VOR/DME
     3  -2.724591667  107.753244444      190    11670   125      1.000  TPN ENRT WI TANJUNG PANDAN VOR/DME
     """
-    row_code = 3
-    lat, rest = payload.lstrip().split(" ", 1)
-    lat = float(lat)
-    lon, rest = rest.lstrip().split(" ", 1)
-    lon = float(lon)
-    elev_ft_above_msl, rest = rest.lstrip().split(" ", 1)
-    elev_ft_above_msl = int(elev_ft_above_msl)
-    freq_mhz_x_100, rest = rest.lstrip().split(" ", 1)
-    freq_mhz_x_100 = int(freq_mhz_x_100)
-    vor_class, rest = rest.lstrip().split(" ", 1)
-    vor_class = vor_code(int(vor_class))
-    vor_class = vor_class.name if vor_class else None
-    slv_var, rest = rest.lstrip().split(" ", 1)
-    slv_var = float(slv_var)
-    local_id, rest = rest.lstrip().split(" ", 1)
-    enrt, rest = rest.lstrip().split(" ", 1)
-    icao_region_code, rest = rest.lstrip().split(" ", 1)
-    name = rest.strip()
+    parts = payload.split(None, 9)
+    lat = float(parts[0])
+    lon = float(parts[1])
+    elev_ft_above_msl = int(parts[2])
+    freq_mhz_x_100 = int(parts[3])
+    vor_class = VOR_NAMES.get(int(parts[4]))
+    slv_var = float(parts[5])
+    local_id = parts[6]
+    enrt = intern(parts[7])
+    icao_region_code = intern(parts[8])
+    name = parts[9]
 
     return "VOR", row_code, lat, lon, elev_ft_above_msl, freq_mhz_x_100, vor_class, slv_var, local_id, enrt, icao_region_code, name
 
 
+def parse_ils(payload, row_code, kind):
+    """Localiser and glideslope rows share one field layout, see parse_loc and parse_gli."""
+    parts = payload.split(None, 10)
+    lat = float(parts[0])
+    lon = float(parts[1])
+    elev_ft_above_msl = int(parts[2])
+    freq_mhz_x_100 = int(parts[3])
+    max_range_nautical_miles = int(parts[4])
+    bearing_true_degrees = float(parts[5])
+    local_id = parts[6]
+    airport_icao = intern(parts[7])
+    icao_region_code = intern(parts[8])
+    runway_no = parts[9]
+    name = parts[10]
+
+    return kind, row_code, lat, lon, elev_ft_above_msl, freq_mhz_x_100, max_range_nautical_miles, bearing_true_degrees, local_id, airport_icao, icao_region_code, runway_no, name
+
+
 def parse_loc(payload, row_code):
     """
     Includes localisers (inc. LOC-only), LDAs and SDFs:
@@ -172,29 +164,10 @@ def parse_loc(payload, row_code):
      4  32.384705556    3.792541667     1512    10950    18 109022.330   GH DAUG DA 30 ILS-cat-II
 
     """
-    row_code = row_code
-    lat, rest = payload.lstrip().split(" ", 1)
-    lat = float(lat)
-    lon, rest = rest.lstrip().split(" ", 1)
-    lon = float(lon)
-    elev_ft_above_msl, rest = rest.lstrip().split(" ", 1)
-    elev_ft_above_msl = int(elev_ft_above_msl)
-    freq_mhz_x_100, rest = rest.lstrip().split(" ", 1)
-    freq_mhz_x_100 = int(freq_mhz_x_100)
-    max_range_nautical_miles, rest = rest.lstrip().split(" ", 1)
-    max_range_nautical_miles = int(max_range_nautical_miles)
-    bearing_true_degrees, rest = rest.lstrip().split(" ", 1)
-    bearing_true_degrees = float(bearing_true_degrees)
-    local_id, rest = rest.lstrip().split(" ", 1)
-    airport_icao, rest = rest.lstrip().split(" ", 1)
-    icao_region_code, rest = rest.lstrip().split(" ", 1)
-    runway_no, rest = rest.lstrip().split(" ", 1)
-    name = rest.strip()
-
-    return "LOC", row_code, lat, lon, elev_ft_above_msl, freq_mhz_x_100, max_range_nautical_miles, bearing_true_degrees, local_id, airport_icao, icao_region_code, runway_no, name
-
-
-def parse_gli(payload):
+    return parse_ils(payload, row_code, "LOC")
+
+
+def parse_gli(payload, row_code):
     """
     Glideslope associated with an ILS:
     ----------------------------------
@@ -225,26 +198,7 @@ def parse_gli(payload):
      6  32.369391667    3.819586111     1512    10950    18 300302.330   GH DAUG DA 30 GS
 
     """
-    row_code = 6
-    lat, rest = payload.lstrip().split(" ", 1)
-    lat = float(lat)
-    lon, rest = rest.lstrip().split(" ", 1)
-    lon = float(lon)
-    elev_ft_above_msl, rest = rest.lstrip().split(" ", 1)
-    elev_ft_above_msl = int(elev_ft_above_msl)
-    freq_mhz_x_100, rest = rest.lstrip().split(" ", 1)
-    freq_mhz_x_100 = int(freq_mhz_x_100)
-    max_range_nautical_miles, rest = rest.lstrip().split(" ", 1)
-    max_range_nautical_miles = int(max_range_nautical_miles)
-    bearing_true_degrees, rest = rest.lstrip().split(" ", 1)
-    bearing_true_degrees = float(bearing_true_degrees)
-    local_id, rest = rest.lstrip().split(" ", 1)
-    airport_icao, rest = rest.lstrip().split(" ", 1)
-    icao_region_code, rest = rest.lstrip().split(" ", 1)
-    runway_no, rest = rest.lstrip().split(" ", 1)
-    name = rest.strip()
-
-    return "GLI", row_code, lat, lon, elev_ft_above_msl, freq_mhz_x_100, max_range_nautical_miles, bearing_true_degrees, local_id, airport_icao, icao_region_code, runway_no, name
+    return parse_ils(payload, row_code, "GLI")
 
 
 def parse_mrk(payload, row_code):
@@ -276,22 +230,15 @@ def parse_mrk(payload, row_code):
      9  64.802127778 -147.886813889      430        0     0     38.049 ICNA PAFA PA 02L IM
      9  61.167966667 -150.047686111      127        0     0     89.913 IANC PANC PA 07R IM
     """
-    row_code = row_code
-    lat, rest = payload.lstrip().split(" ", 1)
-    lat = float(lat)
-    lon, rest = rest.lstrip().split(" ", 1)
-    lon = float(lon)
-    elev_ft_above_msl, rest = rest.lstrip().split(" ", 1)
-    elev_ft_above_msl = int(elev_ft_above_msl)
-    _, rest = rest.lstrip().split(" ", 1)
-    _, rest = rest.lstrip().split(" ", 1)
-    bearing_true_degrees, rest = rest.lstrip().split(" ", 1)
-    bearing_true_degrees = float(bearing_true_degrees)
-    _, rest = rest.lstrip().split(" ", 1)
-    airport_icao, rest = rest.lstrip().split(" ", 1)
-    icao_region_code, rest = rest.lstrip().split(" ", 1)
-    runway_no, rest = rest.lstrip().split(" ", 1)
-    name = rest.strip()
+    parts = payload.split(None, 10)
+    lat = float(parts[0])
+    lon = float(parts[1])
+    elev_ft_above_msl = int(parts[2])
+    bearing_true_degrees = float(parts[5])
+    airport_icao = intern(parts[7])
+    icao_region_code = intern(parts[8])
+    runway_no = parts[9]
+    name = parts[10]
 
     return "MRK", row_code, lat, lon, elev_ft_above_msl, None, None, bearing_true_degrees, None, airport_icao, icao_region_code, runway_no, name
 
@@ -334,38 +281,50 @@ def parse_dme(payload, row_code):
     13 -12.349388889   49.295027778      374    11210   130      0.000   DI ENRT FM ANTSIRANANA DME
 
     """
-    row_code = row_code
-    lat, rest = payload.lstrip().split(" ", 1)
-    lat = float(lat)
-    lon, rest = rest.lstrip().split(" ", 1)
-    lon = float(lon)
-    elev_ft_above_msl, rest = rest.lstrip().split(" ", 1)
-    elev_ft_above_msl = int(elev_ft_above_msl)
-    freq_mhz_x_100, rest = rest.lstrip().split(" ", 1)
-    freq_mhz_x_100 = int(freq_mhz_x_100)
-    dme_service_voumne, rest = rest.lstrip().split(" ", 1)
-    dme_service_voumne = int(dme_service_voumne)
-    bearing_true_degrees, rest = rest.lstrip().split(" ", 1)
-    bearing_true_degrees = float(bearing_true_degrees)
-    local_id, rest = rest.lstrip().split(" ", 1)
-    airport_icao, rest = rest.lstrip().split(" ", 1)
-    icao_region_code, rest = rest.lstrip().split(" ", 1)
-    name = rest.strip()
+    parts = payload.split(None, 9)
+    lat = float(parts[0])
+    lon = float(parts[1])
+    elev_ft_above_msl = int(parts[2])
+    freq_mhz_x_100 = int(parts[3])
+    dme_service_voumne = int(parts[4])
+    bearing_true_degrees = float(parts[5])
+    local_id = parts[6]
+    airport_icao = intern(parts[7])
+    icao_region_code = intern(parts[8])
+    name = parts[9]
 
     return "DME", row_code, lat, lon, elev_ft_above_msl, freq_mhz_x_100, dme_service_voumne, bearing_true_degrees, local_id, airport_icao, icao_region_code, name
 
 
-def has_data(row):
-    """Detect end of data token."""
-    return not row.startswith(END_ROW_CODE_STR)
-
-
 def echo(payload, row_code):
     """ TODO. """
     concept = "FPAP" if row_code == 14 else ("GLS" if row_code == 15 else "LTP/FTP")
     return concept, row_code, payload
 
 
+def end_of_data(_payload, _row_code):
+    """End-of-data row: yields no record so the row loop stops."""
+    return None
+
+
+PARSERS = {
+    "2": (parse_ndb, 2),
+    "3": (parse_vor, 3),
+    "4": (parse_loc, 4),
+    "5": (parse_loc, 5),
+    "6": (parse_gli, 6),
+    "7": (parse_mrk, 7),
+    "8": (parse_mrk, 8),
+    "9": (parse_mrk, 9),
+    "12": (parse_dme, 12),
+    "13": (parse_dme, 13),
+    "14": (echo, 14),
+    "15": (echo, 15),
+    "16": (echo, 16),
+    END_ROW_CODE_STR: (end_of_data, 99),
+}
+
+
 def parse(row):
     """In current data revision expect from the 37116 data rows (including the stop data row):
     5252 2
@@ -383,37 +342,46 @@ def parse(row):
     5346 16
        1 99
     """
-    if not has_data(row):
-        return None
-
-    parser = {
-        2: parse_ndb,
-        3: parse_vor,
-        4: partial(parse_loc, row_code=4),
-        5: partial(parse_loc, row_code=5),
-        6: parse_gli,
-        7: partial(parse_mrk, row_code=7),
-        8: partial(parse_mrk, row_code=8),
-        9: partial(parse_mrk, row_code=9),
-        12: partial(parse_dme, row_code=12),
-        13: partial(parse_dme, row_code=13),
-        14: partial(echo, row_code=14),
-        15: partial(echo, row_code=15),
-        16: partial(echo, row_code=16),
-    }
-    row_code, payload = row.split(" ", 1)
-    return parser.get(int(row_code))(payload)
+    code, _, payload = row.strip().partition(" ")
+    parser, row_code = PARSERS[code]
+    return parser(payload, row_code)
+
+
+# GeoJSON property names per record kind in record order (None marks fields not exported as properties).
+PROPERTIES = {
+    "NDB": ("kind", "row_code", None, None, "elev_ft_above_msl", "freq_khz", "ndb_class", None, "local_id", "ndb_terminal_region_id", "icao_region_code", "name"),
+    "VOR": ("kind", "row_code", None, None, "elev_ft_above_msl", "freq_mhz_x_100", "vor_class", "slv_var", "local_id", "enrt", "icao_region_code", "name"),
+    "LOC": ("kind", "row_code", None, None, "elev_ft_above_msl", "freq_mhz_x_100", "max_range_nautical_miles", "bearing_true_degrees", "local_id", "airport_icao", "icao_region_code", "runway_no", "name"),
+    "GLI": ("kind", "row_code", None, None, "elev_ft_above_msl", "freq_mhz_x_100", "max_range_nautical_miles", "bearing_true_degrees", "local_id", "airport_icao", "icao_region_code", "runway_no", "name"),
+    "MRK": ("kind", "row_code", None, None, "elev_ft_above_msl", None, None, "bearing_true_degrees", None, "airport_icao", "icao_region_code", "runway_no", "name"),
+    "DME": ("kind", "row_code", None, None, "elev_ft_above_msl", "freq_mhz_x_100", "dme_service_volume", "dme_bias_nautical_miles", "local_id", "airport_icao", "icao_region_code", "name"),
+}
+
+
+def feature(record):
+    """Map a navaid record to a GeoJSON point feature."""
+    properties = {key: value for key, value in zip(PROPERTIES[record[0]], record) if key}
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": [record[3], record[2]]}, "properties": properties}
+
+
+def read_records(source):
+    """Parse the rows after the header from a memory map or binary file up to the end of data row."""
+    for _ in range(OFFSET):
+        source.readline()
+    rows = map(bytes.decode, iter(source.readline, b""))
+    return list(takewhile(bool, map(parse, rows)))
 
 
 def main():
-    record_no = 0
-    with open(IN, "rt", encoding="utf-8") as handle:
-        for row in handle.readlines()[OFFSET:]:
-            record_no += 1
-            text = row.strip()
-            record = parse(text)
-            if not record:
-                break
-            print(record_no, record)
+    with open(IN, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size:
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                records = read_records(data)
+        else:  # empty file or pipe, nothing to map
+            records = read_records(handle)
+    sys.stdout.writelines(f"{record_no} {record}\n" for record_no, record in enumerate(records, 1))
+    features = [feature(record) for record in records if record[0] in PROPERTIES]
+    with open(OUT, "wb") as handle:
+        handle.write(orjson.dumps({"type": "FeatureCollection", "features": features}))
 
 main()
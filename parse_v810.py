@@ -1,15 +1,44 @@
 #! /usr/bin/env python
-from functools import partial
+import mmap
+import os
+import sys
+from itertools import islice, takewhile
+from operator import itemgetter
+from typing import Any, BinaryIO, Callable, Dict, List, NamedTuple, Optional, Tuple, Union, cast
 
-import geojson
+import orjson
 
 IN = 'x-plane-v810-earth_nav.dat'
 OUT = 'x-plane-v810-earth_nav.geojson'
 OFFSET = 3
-END_ROW_CODE_STR = str(99)
 
 
-def parse_ndb(payload):
+class NavRecord(NamedTuple):
+    """Navaid record common to all row codes (fields not carried by a row code are None).
+    Note:
+        frequency is in KHz for NDBs and in MHz multiplied by 100 otherwise.
+        bearing_true_degrees holds the slaved variation for VORs and the bias in nautical miles for DMEs.
+    """
+    kind: str
+    row_code: int
+    lat: float
+    lon: float
+    elev_ft_above_msl: int
+    frequency: Optional[int]
+    max_range_nautical_miles: Optional[int]
+    bearing_true_degrees: Optional[float]
+    local_id: Optional[str]
+    airport_icao: Optional[str]
+    runway_no: Optional[str]
+    name: str
+
+
+def parse_head(parts: List[str]) -> Tuple[float, float, int, int]:
+    """Latitude, longitude, elevation and frequency lead every navaid row."""
+    return float(parts[0]), float(parts[1]), int(parts[2]), int(parts[3])
+
+
+def parse_ndb(payload: str) -> NavRecord:
     """
     Non-directional beacon (NDB):
     -----------------------------
@@ -42,24 +71,16 @@ def parse_ndb(payload):
     2  05.25041700 -003.95802800      0   294  50    0.0 PB   ABIDJAN FELIX HOUPHOUET BOIGNY NDB
     """
     row_code = 2
-    lat, rest = payload.lstrip().split(" ", 1)
-    lat = float(lat)
-    lon, rest = rest.lstrip().split(" ", 1)
-    lon = float(lon)
-    elev_ft_above_msl, rest = rest.lstrip().split(" ", 1)
-    elev_ft_above_msl = int(elev_ft_above_msl)
-    freq_khz, rest = rest.lstrip().split(" ", 1)
-    freq_khz = int(freq_khz)
-    max_range_nautical_miles, rest = rest.lstrip().split(" ", 1)
-    max_range_nautical_miles = int(max_range_nautical_miles)
-    _, rest = rest.lstrip().split(" ", 1)
-    local_id, rest = rest.lstrip().split(" ", 1)
-    name = rest.strip()
+    parts = payload.split(None, 7)
+    lat, lon, elev_ft_above_msl, freq_khz = parse_head(parts)
+    max_range_nautical_miles = int(parts[4])
+    local_id = parts[6]
+    name = parts[7].strip()
     
-    return "NDB", row_code, lat, lon, elev_ft_above_msl, freq_khz, max_range_nautical_miles, None, local_id, name
+    return NavRecord("NDB", row_code, lat, lon, elev_ft_above_msl, freq_khz, max_range_nautical_miles, None, local_id, None, None, name)
 
 
-def parse_vor(payload):
+def parse_vor(payload: str) -> NavRecord:
     """
     Includes VOR-DMEs and VORTACs:
     ------------------------------
@@ -93,25 +114,17 @@ def parse_vor(payload):
     3  09.55208333 -069.23791667    758 11340 130  -10.0 AGV  ACARIGUA VOR-DME
     """
     row_code = 3
-    lat, rest = payload.lstrip().split(" ", 1)
-    lat = float(lat)
-    lon, rest = rest.lstrip().split(" ", 1)
-    lon = float(lon)
-    elev_ft_above_msl, rest = rest.lstrip().split(" ", 1)
-    elev_ft_above_msl = int(elev_ft_above_msl)
-    freq_mhz_x_100, rest = rest.lstrip().split(" ", 1)
-    freq_mhz_x_100 = int(freq_mhz_x_100)
-    max_range_nautical_miles, rest = rest.lstrip().split(" ", 1)
-    max_range_nautical_miles = int(max_range_nautical_miles)
-    slv_var, rest = rest.lstrip().split(" ", 1)
-    slv_var = float(slv_var)
-    local_id, rest = rest.lstrip().split(" ", 1)
-    name = rest.strip()
-
-    return "VOR", row_code, lat, lon, elev_ft_above_msl, freq_mhz_x_100, max_range_nautical_miles, slv_var, local_id, name
-
-
-def parse_loc(payload, row_code):
+    parts = payload.split(None, 7)
+    lat, lon, elev_ft_above_msl, freq_mhz_x_100 = parse_head(parts)
+    max_range_nautical_miles = int(parts[4])
+    slv_var = float(parts[5])
+    local_id = parts[6]
+    name = parts[7].strip()
+
+    return NavRecord("VOR", row_code, lat, lon, elev_ft_above_msl, freq_mhz_x_100, max_range_nautical_miles, slv_var, local_id, None, None, name)
+
+
+def parse_loc(payload: str, row_code: int) -> NavRecord:
     """
     Includes localisers (inc. LOC-only), LDAs and SDFs:
     ---------------------------------------------------
@@ -140,28 +153,19 @@ def parse_loc(payload, row_code):
     4  65.74222222 -019.57722222      8 10970  18     351.000 IKR  BIKR 01  ILS-cat-I
 
     """
-    row_code = row_code
-    lat, rest = payload.lstrip().split(" ", 1)
-    lat = float(lat)
-    lon, rest = rest.lstrip().split(" ", 1)
-    lon = float(lon)
-    elev_ft_above_msl, rest = rest.lstrip().split(" ", 1)
-    elev_ft_above_msl = int(elev_ft_above_msl)
-    freq_mhz_x_100, rest = rest.lstrip().split(" ", 1)
-    freq_mhz_x_100 = int(freq_mhz_x_100)
-    max_range_nautical_miles, rest = rest.lstrip().split(" ", 1)
-    max_range_nautical_miles = int(max_range_nautical_miles)
-    bearing_true_degrees, rest = rest.lstrip().split(" ", 1)
-    bearing_true_degrees = float(bearing_true_degrees)
-    local_id, rest = rest.lstrip().split(" ", 1)
-    airport_icao, rest = rest.lstrip().split(" ", 1)
-    runway_no, rest = rest.lstrip().split(" ", 1)
-    name = rest.strip()
-
-    return "LOC", row_code, lat, lon, elev_ft_above_msl, freq_mhz_x_100, max_range_nautical_miles, bearing_true_degrees, local_id, airport_icao, runway_no, name
-
-
-def parse_gli(payload):
+    parts = payload.split(None, 9)
+    lat, lon, elev_ft_above_msl, freq_mhz_x_100 = parse_head(parts)
+    max_range_nautical_miles = int(parts[4])
+    bearing_true_degrees = float(parts[5])
+    local_id = parts[6]
+    airport_icao = parts[7]
+    runway_no = parts[8]
+    name = parts[9].strip()
+
+    return NavRecord("LOC", row_code, lat, lon, elev_ft_above_msl, freq_mhz_x_100, max_range_nautical_miles, bearing_true_degrees, local_id, airport_icao, runway_no, name)
+
+
+def parse_gli(payload: str) -> NavRecord:
     """
     Glideslope associated with an ILS:
     ----------------------------------
@@ -196,27 +200,19 @@ def parse_gli(payload):
 
     """
     row_code = 6
-    lat, rest = payload.lstrip().split(" ", 1)
-    lat = float(lat)
-    lon, rest = rest.lstrip().split(" ", 1)
-    lon = float(lon)
-    elev_ft_above_msl, rest = rest.lstrip().split(" ", 1)
-    elev_ft_above_msl = int(elev_ft_above_msl)
-    freq_mhz_x_100, rest = rest.lstrip().split(" ", 1)
-    freq_mhz_x_100 = int(freq_mhz_x_100)
-    max_range_nautical_miles, rest = rest.lstrip().split(" ", 1)
-    max_range_nautical_miles = int(max_range_nautical_miles)
-    bearing_true_degrees, rest = rest.lstrip().split(" ", 1)
-    bearing_true_degrees = float(bearing_true_degrees)
-    local_id, rest = rest.lstrip().split(" ", 1)
-    airport_icao, rest = rest.lstrip().split(" ", 1)
-    runway_no, rest = rest.lstrip().split(" ", 1)
-    name = rest.strip()
-
-    return "GLI", row_code, lat, lon, elev_ft_above_msl, freq_mhz_x_100, max_range_nautical_miles, bearing_true_degrees, local_id, airport_icao, runway_no, name
-
-
-def parse_mrk(payload, row_code):
+    parts = payload.split(None, 9)
+    lat, lon, elev_ft_above_msl, freq_mhz_x_100 = parse_head(parts)
+    max_range_nautical_miles = int(parts[4])
+    bearing_true_degrees = float(parts[5])
+    local_id = parts[6]
+    airport_icao = parts[7]
+    runway_no = parts[8]
+    name = parts[9].strip()
+
+    return NavRecord("GLI", row_code, lat, lon, elev_ft_above_msl, freq_mhz_x_100, max_range_nautical_miles, bearing_true_degrees, local_id, airport_icao, runway_no, name)
+
+
+def parse_mrk(payload: str, row_code: int) -> NavRecord:
     """
     Marker beacons - Outer (OM), Middle (MM) and Inner (IM) Markers:
     ----------------------------------------------------------------
@@ -244,26 +240,17 @@ def parse_mrk(payload, row_code):
     7  36.75166100  003.31432200     82     0   0     232.742 ---- DAAG 23  OM
 
     """
-    row_code = row_code
-    lat, rest = payload.lstrip().split(" ", 1)
-    lat = float(lat)
-    lon, rest = rest.lstrip().split(" ", 1)
-    lon = float(lon)
-    elev_ft_above_msl, rest = rest.lstrip().split(" ", 1)
-    elev_ft_above_msl = int(elev_ft_above_msl)
-    _, rest = rest.lstrip().split(" ", 1)
-    _, rest = rest.lstrip().split(" ", 1)
-    bearing_true_degrees, rest = rest.lstrip().split(" ", 1)
-    bearing_true_degrees = float(bearing_true_degrees)
-    _, rest = rest.lstrip().split(" ", 1)
-    airport_icao, rest = rest.lstrip().split(" ", 1)
-    runway_no, rest = rest.lstrip().split(" ", 1)
-    name = rest.strip()
-
-    return "MRK", row_code, lat, lon, elev_ft_above_msl, None, None, bearing_true_degrees, None, airport_icao, runway_no, name
-
-
-def parse_dme(payload, row_code):
+    parts = payload.split(None, 9)
+    lat, lon, elev_ft_above_msl, _ = parse_head(parts)
+    bearing_true_degrees = float(parts[5])
+    airport_icao = parts[7]
+    runway_no = parts[8]
+    name = parts[9].strip()
+
+    return NavRecord("MRK", row_code, lat, lon, elev_ft_above_msl, None, None, bearing_true_degrees, None, airport_icao, runway_no, name)
+
+
+def parse_dme(payload: str, row_code: int) -> NavRecord:
     """
     Distance Measuring Equipment (DME):
     -----------------------------------
@@ -293,66 +280,82 @@ def parse_dme(payload, row_code):
     12  45.52196465 -073.40816937     90 11110  18       0.000 IHU  CYHU 24R DME-ILS
 
     """
-    row_code = row_code
-    lat, rest = payload.lstrip().split(" ", 1)
-    lat = float(lat)
-    lon, rest = rest.lstrip().split(" ", 1)
-    lon = float(lon)
-    elev_ft_above_msl, rest = rest.lstrip().split(" ", 1)
-    elev_ft_above_msl = int(elev_ft_above_msl)
-    freq_mhz_x_100, rest = rest.lstrip().split(" ", 1)
-    freq_mhz_x_100 = int(freq_mhz_x_100)
-    max_range_nautical_miles, rest = rest.lstrip().split(" ", 1)
-    max_range_nautical_miles = int(max_range_nautical_miles)
-    bearing_true_degrees, rest = rest.lstrip().split(" ", 1)
-    bearing_true_degrees = float(bearing_true_degrees)
-    local_id, rest = rest.lstrip().split(" ", 1)
-    airport_icao, rest = rest.lstrip().split(" ", 1)
-
-    try:
-        runway_no, rest = rest.lstrip().split(" ", 1)
-        name = rest.strip()
-    except ValueError:
-        runway_no = None
-        name = rest.strip()
-    return "DME", row_code, lat, lon, elev_ft_above_msl, freq_mhz_x_100, max_range_nautical_miles, bearing_true_degrees, local_id, airport_icao, runway_no, name
-
-
-def has_data(row):
-    """Detect end of data token."""
-    return not row.startswith(END_ROW_CODE_STR)
-
-
-def parse(row):
-
-    if not has_data(row):
-        return None
-
-    parser = {
-        2: parse_ndb,
-        3: parse_vor,
-        4: partial(parse_loc, row_code=4),
-        5: partial(parse_loc, row_code=5),
-        6: parse_vor,
-        7: partial(parse_mrk, row_code=7),
-        8: partial(parse_mrk, row_code=8),
-        9: partial(parse_mrk, row_code=9),
-        12: partial(parse_dme, row_code=12),
-        13: partial(parse_dme, row_code=13),
-    }
-    row_code, payload = row.split(" ", 1)
-    return parser.get(int(row_code))(payload)
-
-
-def main():
-    record_no = 0
-    with open(IN, "rt", encoding="utf-8") as handle:
-        for row in handle.readlines()[OFFSET:]:
-            record_no += 1
-            text = row.strip()
-            record = parse(text)
-            if not record:
-                break
-            print(record_no, record)
+    parts = payload.split(None, 8)
+    lat, lon, elev_ft_above_msl, freq_mhz_x_100 = parse_head(parts)
+    max_range_nautical_miles = int(parts[4])
+    bearing_true_degrees = float(parts[5])
+    local_id = parts[6]
+    airport_icao = parts[7]
+    tail = parts[8].split(None, 1)
+    runway_no = tail[0] if len(tail) > 1 else None
+    name = tail[-1].strip()
+    return NavRecord("DME", row_code, lat, lon, elev_ft_above_msl, freq_mhz_x_100, max_range_nautical_miles, bearing_true_degrees, local_id, airport_icao, runway_no, name)
+
+
+def parse(row: str) -> Optional[NavRecord]:
+    row_code, _, payload = row.lstrip().partition(" ")
+    match int(row_code):
+        case 12 | 13 as code:
+            return parse_dme(payload, code)
+        case 2:
+            return parse_ndb(payload)
+        case 3:
+            return parse_vor(payload)
+        case 4 | 5 as code:
+            return parse_loc(payload, code)
+        case 6:
+            return parse_gli(payload)
+        case 7 | 8 | 9 as code:
+            return parse_mrk(payload, code)
+        case 99:
+            return None
+    raise ValueError(f"unknown row code {row_code}")
+
+
+# Listing slots per record kind (NDBs and VORs carry no airport and runway slots).
+LISTED: Dict[str, Callable[[NavRecord], Tuple[Any, ...]]] = {
+    "NDB": itemgetter(0, 1, 2, 3, 4, 5, 6, 7, 8, 11),
+    "VOR": itemgetter(0, 1, 2, 3, 4, 5, 6, 7, 8, 11),
+    "LOC": tuple,
+    "GLI": tuple,
+    "MRK": tuple,
+    "DME": tuple,
+}
+
+
+# GeoJSON property names per record kind in record order (None marks fields not exported as properties).
+PROPERTIES: Dict[str, Tuple[Optional[str], ...]] = {
+    "NDB": ("kind", "row_code", None, None, "elev_ft_above_msl", "freq_khz", "max_range_nautical_miles", None, "local_id", None, None, "name"),
+    "VOR": ("kind", "row_code", None, None, "elev_ft_above_msl", "freq_mhz_x_100", "max_range_nautical_miles", "slv_var", "local_id", None, None, "name"),
+    "LOC": ("kind", "row_code", None, None, "elev_ft_above_msl", "freq_mhz_x_100", "max_range_nautical_miles", "bearing_true_degrees", "local_id", "airport_icao", "runway_no", "name"),
+    "GLI": ("kind", "row_code", None, None, "elev_ft_above_msl", "freq_mhz_x_100", "max_range_nautical_miles", "bearing_true_degrees", "local_id", "airport_icao", "runway_no", "name"),
+    "MRK": ("kind", "row_code", None, None, "elev_ft_above_msl", None, None, "bearing_true_degrees", None, "airport_icao", "runway_no", "name"),
+    "DME": ("kind", "row_code", None, None, "elev_ft_above_msl", "freq_mhz_x_100", "max_range_nautical_miles", "dme_bias_nautical_miles", "local_id", "airport_icao", "runway_no", "name"),
+}
+
+
+def feature(record: NavRecord) -> Dict[str, Any]:
+    """Map a navaid record to a GeoJSON point feature."""
+    properties = {key: value for key, value in zip(PROPERTIES[record.kind], record) if key}
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": [record.lon, record.lat]}, "properties": properties}
+
+
+def read_records(source: Union[mmap.mmap, BinaryIO]) -> List[NavRecord]:
+    """Parse the rows after the header from a memory map or binary file up to the end of data row."""
+    rows = islice(map(bytes.decode, iter(source.readline, b"")), OFFSET, None)
+    return cast(List[NavRecord], list(takewhile(bool, map(parse, rows))))
+
+
+def main() -> None:
+    with open(IN, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size:
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                records = read_records(data)
+        else:  # empty file or pipe, nothing to map
+            records = read_records(handle)
+    sys.stdout.writelines(f"{record_no} {LISTED[record.kind](record)}\n" for record_no, record in enumerate(records, 1))
+    features = [feature(record) for record in records]
+    with open(OUT, "wb") as out:
+        out.write(orjson.dumps({"type": "FeatureCollection", "features": features}))
 
 main()